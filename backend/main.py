@@ -1,41 +1,381 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager, suppress
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Annotated, Dict, Iterator, List, Optional
 from uuid import uuid4
-import json
+import anyio
+import asyncio
+import logging
+import os
+import re
+import sys
 from pathlib import Path
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so only a single worker is safe
+    fcntl = None
+import msgspec
+import orjson
 
 APP_TITLE = "Notes Organizer Backend"
 APP_DESC = "FastAPI backend providing CRUD operations for notes"
 APP_VERSION = "1.0.0"
 
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the group-commit writer for the lifetime of the application."""
+    global _commit_queue, _store_lock, _committer_task
+    _commit_queue = asyncio.Queue()
+    _store_lock = asyncio.Lock()
+    _committer_task = asyncio.create_task(_committer(_commit_queue))
+    _committer_task.add_done_callback(_on_committer_done)
+    yield
+    _committer_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await _committer_task
+
 app = FastAPI(title=APP_TITLE, description=APP_DESC, version=APP_VERSION,
+              lifespan=lifespan,
               openapi_tags=[
                   {"name": "Health", "description": "Health check endpoint"},
                   {"name": "Notes", "description": "CRUD operations for notes"}
               ])
 
-# Simple file storage (JSON)
-DATA_DIR = Path(__file__).parent / "data"
+# Simple file storage: a JSON snapshot plus an append-only log of mutations
+# (one JSON record per line) that is folded back into the snapshot once it
+# grows past LOG_COMPACT_RATIO times the snapshot size.
+DATA_DIR = Path(os.environ.get("NOTES_DATA_DIR") or Path(__file__).parent / "data")
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 DATA_FILE = DATA_DIR / "notes.json"
+LOG_FILE = DATA_DIR / "notes.log"
+# flock()ed by whichever process (uvicorn worker) is reading or writing the
+# data files, so workers never observe or clobber each other's partial writes.
+LOCK_FILE = DATA_DIR / "notes.lock"
+LOG_COMPACT_RATIO = 4
+LOG_COMPACT_MIN_BYTES = 64 * 1024
+# Upper bound on mutations folded into one log write + fsync.
+COMMIT_BATCH_MAX = 256
+# GET /notes streams lists longer than this in ~STREAM_CHUNK_BYTES pieces
+# instead of encoding the whole array up front.
+STREAM_THRESHOLD = 1000
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# In-memory mirror of the stored notes, oldest first. Keyed by id so updates
+# and deletes are a single hash lookup rather than a scan of the note list.
+_notes: Dict[str, dict] = {}
+
+# Pending (record, future) pairs for the group-commit writer; see _committer.
+_commit_queue: Optional[asyncio.Queue] = None
+_committer_task: Optional[asyncio.Task] = None
+
+# Held while the mirror is being changed (commit or reload) so a reload
+# cannot drop a batch that is still being written; _locked_store() pairs it
+# with the cross-process LOCK_FILE lock. Every mutation of the
+# mirror happens under this lock, and worker threads only read the mirror or
+# build a replacement that is swapped in whole, so no thread-level lock is
+# needed. Ids are random uuid4 values, so there is no shared counter to guard.
+_store_lock: Optional[asyncio.Lock] = None
+
+# On-disk state the mirror reflects, as returned by _disk_state(); the files
+# are only re-read when this changes (e.g. another process wrote to them).
+_disk_stamp: Optional[tuple] = None
 
 def _load_notes() -> List[dict]:
     if not DATA_FILE.exists():
         return []
     try:
-        with DATA_FILE.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-            if isinstance(data, list):
-                return data
-            return []
+        data = orjson.loads(DATA_FILE.read_bytes())
+        if isinstance(data, list):
+            return data
+        return []
     except Exception:
         return []
 
+def _write_file(path: Path, data: bytes, flags: int) -> int:
+    """Write a pre-serialized buffer in one write() call, fsync, and return the file size."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | flags, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        os.fsync(fd)
+        return os.lseek(fd, 0, os.SEEK_CUR)
+    finally:
+        os.close(fd)
+
 def _save_notes(notes: List[dict]) -> None:
-    with DATA_FILE.open("w", encoding="utf-8") as f:
-        json.dump(notes, f, indent=2, ensure_ascii=False)
+    tmp_file = DATA_FILE.with_suffix(".json.tmp")
+    _write_file(tmp_file, orjson.dumps(notes, option=orjson.OPT_INDENT_2), os.O_TRUNC)
+    os.replace(tmp_file, DATA_FILE)
+
+def _list_notes() -> List[dict]:
+    """Return all notes, newest first.
+
+    New notes are appended to the end of the mirror, which is O(1), and the
+    order is reversed here once per read instead of prepending on every create.
+    """
+    return list(reversed(_notes.values()))
+
+# Shared JSON encoder for note responses; notes are plain dicts, so msgspec
+# encodes them directly without building intermediate model instances.
+_encoder = msgspec.json.Encoder()
+
+async def get_encoder() -> msgspec.json.Encoder:
+    """Dependency returning the shared encoder.
+
+    Declared ``async`` so FastAPI resolves it on the event loop; a plain
+    ``def`` dependency would be dispatched to the threadpool on every request.
+    """
+    return _encoder
+
+def _iter_json(notes: List[dict], encoder: msgspec.json.Encoder) -> Iterator[bytes]:
+    """Encode notes as a JSON array, yielding it in chunks."""
+    buf = bytearray(b"[")
+    for i, n in enumerate(notes):
+        if i:
+            buf += b","
+        encoder.encode_into(n, buf, -1)
+        if len(buf) >= STREAM_CHUNK_BYTES:
+            yield bytes(buf)
+            buf.clear()
+    buf += b"]"
+    yield bytes(buf)
+
+def _intern_tags(tags: List[str]) -> List[str]:
+    """Share a single string object per distinct tag across all notes."""
+    return [sys.intern(t) for t in tags]
+
+def _apply(notes: Dict[str, dict], record: dict) -> Optional[dict]:
+    """Apply a mutation record to a mirror of the notes.
+
+    Returns the record to persist, or None if it targets a missing note or has
+    an unknown op. ``update`` records carry partial changes and are persisted
+    as a ``put`` of the resulting note.
+    """
+    op = record["op"]
+    if op == "put":
+        note = record["note"]
+        note["tags"] = _intern_tags(note.get("tags") or [])
+        notes[note["id"]] = note
+        return record
+    note = notes.get(record["id"])
+    if note is None:
+        return None
+    if op == "update":
+        # Copy-on-write: the previous dict is never mutated, so anything still
+        # holding it (an earlier response, a reader) keeps a consistent note.
+        note = {**note, **record["changes"]}
+        if "tags" in record["changes"]:
+            note["tags"] = _intern_tags(note["tags"])
+        notes[note["id"]] = note
+        return {"op": "put", "note": note}
+    if op == "del":
+        del notes[record["id"]]
+        return record
+    return None
+
+def _disk_state() -> tuple:
+    """Return (mtime_ns, size) of the snapshot and the log, None for a missing file."""
+    stamp = []
+    for path in (DATA_FILE, LOG_FILE):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            stamp.append(None)
+        else:
+            stamp.append((st.st_mtime_ns, st.st_size))
+    return tuple(stamp)
+
+def _compact(notes: List[dict]) -> None:
+    """Fold the mutation log into the snapshot and start a fresh log."""
+    _save_notes(notes)
+    LOG_FILE.unlink(missing_ok=True)
+
+def _replay() -> None:
+    """Rebuild the in-memory mirror from the snapshot and the mutation log.
+
+    The new mirror is built aside and swapped in at the end, so readers never
+    observe a partially loaded store while this runs in a worker thread.
+    """
+    global _notes, _disk_stamp
+    # Stamp before reading so a write racing with the read triggers another reload.
+    stamp = _disk_state()
+    notes = {}
+    for n in reversed(_load_notes()):
+        # Skip malformed entries rather than refusing to start.
+        if not isinstance(n, dict) or not isinstance(n.get("id"), str):
+            continue
+        n["tags"] = _intern_tags(n.get("tags") or [])
+        notes[n["id"]] = n
+    torn = False
+    if LOG_FILE.exists():
+        for line in LOG_FILE.read_bytes().splitlines():
+            try:
+                record = orjson.loads(line)
+            except ValueError:
+                torn = True
+                break
+            try:
+                _apply(notes, record)
+            except (KeyError, TypeError, AttributeError):
+                # Well-formed JSON but not a record we understand: skip it.
+                continue
+    if torn:
+        # Torn record from an interrupted append: keep what replayed cleanly
+        # and rewrite the snapshot so later appends start on a clean log.
+        _compact(list(reversed(notes.values())))
+        stamp = _disk_state()
+    _notes = notes
+    _disk_stamp = stamp
+
+def _lock_data_files() -> int:
+    """Block until this process holds the data file lock; close the fd to release it.
+
+    Without fcntl (Windows) the file is opened but not locked, so the store is
+    only protected by the in-process lock and must be served by one worker.
+    """
+    fd = os.open(LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+    if fcntl is None:
+        return fd
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    except BaseException:
+        os.close(fd)
+        raise
+    return fd
+
+@asynccontextmanager
+async def _locked_store():
+    """Hold the in-process store lock and the cross-process data file lock."""
+    async with _store_lock:
+        fd = await anyio.to_thread.run_sync(_lock_data_files)
+        try:
+            yield
+        finally:
+            os.close(fd)
+
+async def _reload_if_stale() -> None:
+    """Replay from disk, off the event loop, if the data files changed since the last load."""
+    if _disk_state() != _disk_stamp:
+        await anyio.to_thread.run_sync(_replay)
+
+async def _refresh() -> None:
+    """Pick up changes written to the data files outside this process."""
+    if _disk_state() == _disk_stamp:
+        return
+    async with _locked_store():
+        await _reload_if_stale()
+
+def _persist(records: List[dict], notes: Dict[str, dict]) -> None:
+    """Append records to the log with one write and fsync, compacting if needed.
+
+    ``notes`` is the state after the batch; it becomes the snapshot when the
+    log is compacted.
+
+    The batch is committed once the append is fsynced. Compaction afterwards
+    is best-effort: if it fails the log is simply kept and compaction is
+    retried after a later batch, so the caller is never told that an
+    already-durable batch failed.
+    """
+    global _disk_stamp
+    if not records:
+        return
+    buf = b"".join(orjson.dumps(r, option=orjson.OPT_APPEND_NEWLINE) for r in records)
+    log_size = _write_file(LOG_FILE, buf, os.O_APPEND)
+    try:
+        snapshot_size = DATA_FILE.stat().st_size if DATA_FILE.exists() else 0
+        if log_size > max(LOG_COMPACT_MIN_BYTES, LOG_COMPACT_RATIO * snapshot_size):
+            _compact(list(reversed(notes.values())))
+        _disk_stamp = _disk_state()
+    except Exception:
+        logger.exception("Compacting %s into %s failed; keeping the log", LOG_FILE, DATA_FILE)
+        # The mirror matches what is on disk, but re-check the files next time.
+        _disk_stamp = None
+
+def _fail_pending(items: List[tuple], exc: BaseException) -> None:
+    """Fail the futures of (record, future) pairs that are still waiting."""
+    for _, future in items:
+        if not future.done():
+            future.set_exception(exc)
+
+async def _commit_batch(batch: List[tuple]) -> List[Optional[dict]]:
+    """Validate, apply and durably persist one batch; return each record's result.
+
+    The batch is applied to a staged copy of the mirror, which is published
+    only after the log write is fsynced, so readers never see changes that
+    are not yet durable and a failed batch leaves the mirror untouched.
+    """
+    global _notes, _disk_stamp
+    async with _locked_store():
+        # Another worker may have committed since our last look; validate
+        # this batch against its changes, not a stale mirror.
+        await _reload_if_stale()
+        staged = dict(_notes)
+        applied = [_apply(staged, record) for record, _ in batch]
+        try:
+            await anyio.to_thread.run_sync(_persist, [r for r in applied if r is not None], staged)
+        except BaseException:
+            # Part of the batch may have reached the log; re-check the files
+            # on next access rather than trusting the current stamp.
+            _disk_stamp = None
+            raise
+        _notes = staged
+    return applied
+
+async def _committer(queue: asyncio.Queue) -> None:
+    """Group commit: drain queued mutations and make each batch durable at once.
+
+    Records are applied in arrival order so conflicting requests see each
+    other, then written with a single write + fsync off the event loop.
+    Futures resolve only once the batch is on disk; mutations that arrive
+    during an fsync accumulate and form the next batch. A failing batch fails
+    only its own requests; the writer keeps serving later ones.
+    """
+    while True:
+        batch = [await queue.get()]
+        while len(batch) < COMMIT_BATCH_MAX and not queue.empty():
+            batch.append(queue.get_nowait())
+        try:
+            applied = await _commit_batch(batch)
+        except asyncio.CancelledError:
+            _fail_pending(batch, RuntimeError("Note store writer stopped"))
+            raise
+        except Exception as exc:
+            logger.exception("Committing %d note mutation(s) failed", len(batch))
+            _fail_pending(batch, exc)
+            continue
+        for (_, future), result in zip(batch, applied):
+            if not future.done():
+                future.set_result(result)
+
+def _on_committer_done(task: asyncio.Task) -> None:
+    """Fail whatever is still queued once the writer task has exited."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Note store writer crashed", exc_info=task.exception())
+    pending = []
+    while not _commit_queue.empty():
+        pending.append(_commit_queue.get_nowait())
+    _fail_pending(pending, RuntimeError("Note store writer stopped"))
+
+async def _submit(record: dict) -> Optional[dict]:
+    """Queue a mutation for the next group commit and wait until it is durable."""
+    if _committer_task is None or _committer_task.done():
+        raise RuntimeError("Note store writer is not running")
+    future = asyncio.get_running_loop().create_future()
+    await _commit_queue.put((record, future))
+    return await future
+
+_startup_lock = _lock_data_files()
+try:
+    _replay()
+finally:
+    os.close(_startup_lock)
 
 
 class NoteBase(BaseModel):
@@ -59,8 +399,71 @@ class NoteUpdate(BaseModel):
 
 class Note(NoteBase):
     """Note response model."""
-    id: str = Field(..., description="Unique identifier for the note")
+    id: str = Field(..., description="Unique identifier for the note (opaque string; new notes get a 32-character hex UUID)")
+
+
+# The write path decodes request bodies with msgspec straight into these
+# structs, validating in the same pass as parsing. They mirror NoteCreate and
+# NoteUpdate, which remain the documented request schemas.
+class NoteIn(msgspec.Struct):
+    """Decoded create payload."""
+    title: Annotated[str, msgspec.Meta(min_length=1)]
+    content: str = ""
+    tags: Optional[List[str]] = None
+
 
+class NoteChanges(msgspec.Struct):
+    """Decoded update payload; None means the field is left unchanged."""
+    title: Optional[str] = None
+    content: Optional[str] = None
+    tags: Optional[List[str]] = None
+
+
+_note_in_decoder = msgspec.json.Decoder(NoteIn)
+_note_changes_decoder = msgspec.json.Decoder(NoteChanges)
+
+def _validation_errors(exc: msgspec.DecodeError) -> List[dict]:
+    """Translate a msgspec decode error into FastAPI's validation error entries.
+
+    msgspec exposes no structured error details, so the location and missing
+    field are parsed out of its message text; this relies on the wording of the
+    msgspec releases pinned in requirements.txt. Every other validation failure
+    is reported with type ``value_error`` rather than pydantic's specific types.
+    """
+    if not isinstance(exc, msgspec.ValidationError):
+        return [{"loc": ("body",), "msg": "JSON decode error", "type": "json_invalid"}]
+    # msgspec reports e.g. "Expected `str` of length >= 1 - at `$.title`".
+    msg, _, path = str(exc).partition(" - at `")
+    loc = ["body"]
+    for key, index in re.findall(r"\.([^.\[`]+)|\[(\d+)\]", path):
+        loc.append(key or int(index))
+    missing = re.fullmatch(r"Object missing required field `([^`]+)`", msg)
+    if missing:
+        return [{"loc": (*loc, missing.group(1)), "msg": "Field required", "type": "missing"}]
+    return [{"loc": tuple(loc), "msg": msg, "type": "value_error"}]
+
+async def _decode_body(request: Request, decoder: msgspec.json.Decoder):
+    """Parse and validate a JSON request body, failing with FastAPI's usual 422."""
+    try:
+        return decoder.decode(await request.body())
+    except msgspec.DecodeError as exc:
+        raise RequestValidationError(_validation_errors(exc))
+
+# POST /notes decodes its own body, so FastAPI does not document the 422 it can
+# return; point it at the HTTPValidationError schema FastAPI already generates.
+_VALIDATION_ERROR_RESPONSE = {
+    "description": "Validation Error",
+    "content": {"application/json": {"schema": {"$ref": "#/components/schemas/HTTPValidationError"}}},
+}
+
+def _json_body(model: type) -> dict:
+    """OpenAPI requestBody for a route that reads and decodes its own JSON body."""
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": model.model_json_schema()}}}}
+
+
+# Compress larger responses (mainly GET /notes); small ones such as the health
+# check stay below minimum_size and are sent as-is.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 # Enable CORS for frontend
 origins = [
@@ -71,62 +474,66 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "DELETE"],
+    allow_headers=["Content-Type"],
+)
+
+# The health payload never changes, so it is serialized once and the same
+# response object is returned for every probe.
+_HEALTH_RESPONSE = Response(
+    content=orjson.dumps({"status": "ok", "service": APP_TITLE, "version": APP_VERSION}),
+    media_type="application/json",
 )
 
 # PUBLIC_INTERFACE
 @app.get("/", tags=["Health"], summary="Health check", description="Returns API health status.")
-def health():
+async def health() -> Response:
     """Health endpoint indicating that the backend service is running."""
-    return {"status": "ok", "service": APP_TITLE, "version": APP_VERSION}
+    return _HEALTH_RESPONSE
 
 # PUBLIC_INTERFACE
-@app.get("/notes", response_model=List[Note], tags=["Notes"], summary="List notes", description="Returns the list of all notes.")
-def list_notes():
-    """List all notes."""
-    return _load_notes()
+@app.get("/notes", responses={200: {"model": List[Note]}}, tags=["Notes"], summary="List notes", description="Returns the list of all notes.")
+async def list_notes(encoder: msgspec.json.Encoder = Depends(get_encoder)) -> Response:
+    """List all notes.
+
+    Stored notes are already well-formed, so they are encoded as-is instead of
+    being re-validated through ``response_model``.
+    """
+    await _refresh()
+    notes = _list_notes()
+    if len(notes) > STREAM_THRESHOLD:
+        return StreamingResponse(_iter_json(notes, encoder), media_type="application/json")
+    return Response(content=encoder.encode(notes), media_type="application/json")
 
 # PUBLIC_INTERFACE
-@app.post("/notes", response_model=Note, tags=["Notes"], summary="Create note", description="Create a new note with title, content, and optional tags.", status_code=201)
-def create_note(payload: NoteCreate):
+@app.post("/notes", responses={201: {"model": Note}, 422: _VALIDATION_ERROR_RESPONSE}, openapi_extra=_json_body(NoteCreate), tags=["Notes"], summary="Create note", description="Create a new note with title, content, and optional tags.", status_code=201)
+async def create_note(request: Request, encoder: msgspec.json.Encoder = Depends(get_encoder)) -> Response:
     """Create a new note."""
-    notes = _load_notes()
+    payload = await _decode_body(request, _note_in_decoder)
     new_note = {
-        "id": str(uuid4()),
+        "id": uuid4().hex,
         "title": payload.title,
         "content": payload.content,
         "tags": payload.tags or [],
     }
-    notes.insert(0, new_note)
-    _save_notes(notes)
-    return new_note
+    await _submit({"op": "put", "note": new_note})
+    return Response(content=encoder.encode(new_note), media_type="application/json", status_code=201)
 
 # PUBLIC_INTERFACE
-@app.put("/notes/{note_id}", response_model=Note, tags=["Notes"], summary="Update note", description="Update an existing note by ID.")
-def update_note(note_id: str, payload: NoteUpdate):
+@app.put("/notes/{note_id}", responses={200: {"model": Note}}, openapi_extra=_json_body(NoteUpdate), tags=["Notes"], summary="Update note", description="Update an existing note by ID.")
+async def update_note(note_id: str, request: Request, encoder: msgspec.json.Encoder = Depends(get_encoder)) -> Response:
     """Update an existing note by ID."""
-    notes = _load_notes()
-    for idx, n in enumerate(notes):
-        if n.get("id") == note_id:
-            if payload.title is not None:
-                n["title"] = payload.title
-            if payload.content is not None:
-                n["content"] = payload.content
-            if payload.tags is not None:
-                n["tags"] = payload.tags
-            notes[idx] = n
-            _save_notes(notes)
-            return n
-    raise HTTPException(status_code=404, detail="Note not found")
+    payload = await _decode_body(request, _note_changes_decoder)
+    changes = {k: v for k, v in msgspec.structs.asdict(payload).items() if v is not None}
+    record = await _submit({"op": "update", "id": note_id, "changes": changes})
+    if record is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    return Response(content=encoder.encode(record["note"]), media_type="application/json")
 
 # PUBLIC_INTERFACE
 @app.delete("/notes/{note_id}", tags=["Notes"], summary="Delete note", description="Delete an existing note by ID.")
-def delete_note(note_id: str):
+async def delete_note(note_id: str):
     """Delete an existing note by ID."""
-    notes = _load_notes()
-    filtered = [n for n in notes if n.get("id") != note_id]
-    if len(filtered) == len(notes):
+    if await _submit({"op": "del", "id": note_id}) is None:
         raise HTTPException(status_code=404, detail="Note not found")
-    _save_notes(filtered)
     return {"ok": True, "deleted": note_id}
@@ -0,0 +1,36 @@
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import httpx
+import pytest
+
+# main.py loads the store at import time; keep that away from backend/data.
+os.environ.setdefault("NOTES_DATA_DIR", tempfile.mkdtemp(prefix="notes-test-"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Point the note store at an empty data directory for one test."""
+    for name in ("DATA_FILE", "LOG_FILE", "LOCK_FILE"):
+        monkeypatch.setattr(main, name, tmp_path / getattr(main, name).name)
+    main._replay()
+    return tmp_path
+
+
+@pytest.fixture
+def api(store):
+    """Run ``fn(client)`` against the app with its lifespan (and committer) running."""
+    def run(fn):
+        async def session():
+            async with main.lifespan(main.app):
+                transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    return await fn(client)
+        return asyncio.run(session())
+    return run
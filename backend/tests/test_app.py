@@ -0,0 +1,76 @@
+import fastapi.dependencies.utils
+import fastapi.routing
+import orjson
+import pytest
+
+import main
+
+
+def test_requests_do_not_use_the_threadpool(api, monkeypatch):
+    dispatched = []
+
+    def spy(real):
+        async def run_in_threadpool(func, *args, **kwargs):
+            dispatched.append(getattr(func, "__name__", repr(func)))
+            return await real(func, *args, **kwargs)
+        return run_in_threadpool
+
+    for module in (fastapi.dependencies.utils, fastapi.routing):
+        monkeypatch.setattr(module, "run_in_threadpool", spy(module.run_in_threadpool))
+
+    async def scenario(client):
+        await client.get("/")
+        note = (await client.post("/notes", json={"title": "a"})).json()
+        await client.put(f"/notes/{note['id']}", json={"title": "b"})
+        await client.get("/notes")
+        await client.delete(f"/notes/{note['id']}")
+
+    api(scenario)
+    assert dispatched == []
+
+
+def test_iter_json_empty_list():
+    assert b"".join(main._iter_json([], main._encoder)) == b"[]"
+
+
+def test_iter_json_splits_at_chunk_boundary(monkeypatch):
+    monkeypatch.setattr(main, "STREAM_CHUNK_BYTES", 16)
+    notes = [{"id": str(i), "title": "x" * i} for i in range(10)]
+    chunks = list(main._iter_json(notes, main._encoder))
+    assert len(chunks) > 1
+    assert orjson.loads(b"".join(chunks)) == notes
+
+
+def test_large_note_list_is_streamed(api, monkeypatch):
+    monkeypatch.setattr(main, "STREAM_THRESHOLD", 2)
+    monkeypatch.setattr(main, "STREAM_CHUNK_BYTES", 64)
+
+    async def scenario(client):
+        created = [(await client.post("/notes", json={"title": f"note {i}"})).json() for i in range(5)]
+        return created, await client.get("/notes")
+
+    created, response = api(scenario)
+    assert response.status_code == 200
+    assert "content-length" not in response.headers
+    assert response.json() == created[::-1]
+
+
+@pytest.mark.parametrize("notes, compressed", [(1, False), (40, True)])
+def test_responses_above_one_kib_are_gzipped(api, notes, compressed):
+    async def scenario(client):
+        for i in range(notes):
+            await client.post("/notes", json={"title": f"note {i}", "content": "x" * 40})
+        return await client.get("/notes", headers={"Accept-Encoding": "gzip"})
+
+    response = api(scenario)
+    assert response.status_code == 200
+    assert (response.headers.get("content-encoding") == "gzip") is compressed
+    assert len(response.json()) == notes
+
+
+def test_health_check_is_not_gzipped(api):
+    async def scenario(client):
+        return await client.get("/", headers={"Accept-Encoding": "gzip"})
+
+    response = api(scenario)
+    assert "content-encoding" not in response.headers
@@ -0,0 +1,71 @@
+import msgspec
+import pytest
+
+import main
+
+
+def _struct_schema(struct):
+    schema = msgspec.json.schema(struct)
+    return schema["$defs"][schema["$ref"].rsplit("/", 1)[1]]
+
+
+def _nullable(prop):
+    return any(option.get("type") == "null" for option in prop.get("anyOf", []))
+
+
+@pytest.mark.parametrize("struct, model", [
+    (main.NoteIn, main.NoteCreate),
+    (main.NoteChanges, main.NoteUpdate),
+])
+def test_decoded_payloads_match_documented_models(struct, model):
+    decoded = _struct_schema(struct)
+    documented = model.model_json_schema()
+    assert decoded["properties"].keys() == documented["properties"].keys()
+    assert set(decoded.get("required", [])) == set(documented.get("required", []))
+    for name, prop in documented["properties"].items():
+        assert decoded["properties"][name].get("minLength") == prop.get("minLength"), name
+        assert _nullable(decoded["properties"][name]) == _nullable(prop), name
+
+
+@pytest.mark.parametrize("body, loc, error_type", [
+    (b'{"content": "x"}', ["body", "title"], "missing"),
+    (b'{"title": ""}', ["body", "title"], "value_error"),
+    (b'{"title": "t", "tags": [1]}', ["body", "tags", 0], "value_error"),
+    (b'{"title": ', ["body"], "json_invalid"),
+])
+def test_create_rejects_invalid_body_with_fastapi_error_shape(api, body, loc, error_type):
+    async def scenario(client):
+        return await client.post("/notes", content=body, headers={"Content-Type": "application/json"})
+
+    response = api(scenario)
+    assert response.status_code == 422
+    [error] = response.json()["detail"]
+    assert error["loc"] == loc
+    assert error["type"] == error_type
+    assert error["msg"]
+
+
+def test_update_rejects_invalid_body_with_fastapi_error_shape(api):
+    async def scenario(client):
+        note = (await client.post("/notes", json={"title": "a"})).json()
+        return await client.put(f"/notes/{note['id']}", json={"content": 5})
+
+    response = api(scenario)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "content"]
+
+
+def test_unknown_fields_are_ignored(api):
+    async def scenario(client):
+        return await client.post("/notes", json={"title": "a", "color": "red"})
+
+    response = api(scenario)
+    assert response.status_code == 201
+    assert "color" not in response.json()
+
+
+@pytest.mark.parametrize("path, method", [("/notes", "post"), ("/notes/{note_id}", "put")])
+def test_body_routes_document_validation_errors(path, method):
+    schema = main.app.openapi()
+    ref = schema["paths"][path][method]["responses"]["422"]["content"]["application/json"]["schema"]["$ref"]
+    assert ref.rsplit("/", 1)[1] in schema["components"]["schemas"]
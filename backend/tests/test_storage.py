@@ -0,0 +1,255 @@
+import asyncio
+import time
+
+import orjson
+
+import main
+
+
+def _write_log(store, *records):
+    with (store / "notes.log").open("ab") as f:
+        for record in records:
+            f.write(orjson.dumps(record) + b"\n")
+
+
+def test_replay_skips_malformed_snapshot_entries(store):
+    (store / "notes.json").write_bytes(orjson.dumps([
+        {"id": "a", "title": "no tags", "content": ""},
+        "not a note",
+        {"title": "no id"},
+        {"id": "b", "title": "ok", "content": "", "tags": ["x"]},
+    ]))
+    main._replay()
+    assert [(n["id"], n["tags"]) for n in main._list_notes()] == [("a", []), ("b", ["x"])]
+
+
+def test_replay_skips_malformed_log_records(store):
+    _write_log(
+        store,
+        {"op": "put", "note": {"id": "a", "title": "a", "content": ""}},
+        {"op": "put"},
+        ["not", "a", "record"],
+        {"op": "put", "note": "nope"},
+        {"op": "bogus", "id": "a"},
+        {"op": "put", "note": {"id": "b", "title": "b", "content": "", "tags": []}},
+    )
+    main._replay()
+    assert [n["id"] for n in main._list_notes()] == ["b", "a"]
+
+
+def test_failed_compaction_still_acknowledges_the_batch(api, store, monkeypatch):
+    monkeypatch.setattr(main, "LOG_COMPACT_MIN_BYTES", 0)
+
+    def no_space(notes):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(main, "_save_notes", no_space)
+
+    async def scenario(client):
+        first = await client.post("/notes", json={"title": "first"})
+        second = await client.post("/notes", json={"title": "second"})
+        listed = await client.get("/notes")
+        return first, second, listed
+
+    first, second, listed = api(scenario)
+    assert (first.status_code, second.status_code) == (201, 201)
+    assert [n["title"] for n in listed.json()] == ["second", "first"]
+    assert not (store / "notes.json").exists()
+    main._replay()
+    assert [n["title"] for n in main._list_notes()] == ["second", "first"]
+
+
+def test_updates_in_one_batch_each_see_their_own_result(store):
+    notes = {"a": {"id": "a", "title": "orig", "content": "", "tags": []}}
+    first = main._apply(notes, {"op": "update", "id": "a", "changes": {"title": "first"}})
+    second = main._apply(notes, {"op": "update", "id": "a", "changes": {"title": "second"}})
+    assert first["note"] is not second["note"]
+    assert first["note"]["title"] == "first"
+    assert second["note"]["title"] == "second"
+    assert notes["a"]["title"] == "second"
+
+
+def test_concurrent_puts_return_their_own_state(api):
+    async def scenario(client):
+        note = (await client.post("/notes", json={"title": "orig"})).json()
+        first, second = await asyncio.gather(
+            main._submit({"op": "update", "id": note["id"], "changes": {"title": "first"}}),
+            main._submit({"op": "update", "id": note["id"], "changes": {"title": "second"}}),
+        )
+        return first, second, (await client.get("/notes")).json()
+
+    first, second, listed = api(scenario)
+    assert first["note"]["title"] == "first"
+    assert second["note"]["title"] == "second"
+    assert listed[0]["title"] == "second"
+
+
+def _fail_once(monkeypatch, name, exc):
+    real = getattr(main, name)
+    calls = []
+
+    def flaky(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            raise exc
+        return real(*args)
+
+    monkeypatch.setattr(main, name, flaky)
+
+
+def test_lock_error_fails_its_batch_without_stalling_the_writer(api, monkeypatch):
+    _fail_once(monkeypatch, "_lock_data_files", OSError("lock unavailable"))
+
+    async def scenario(client):
+        first = await asyncio.wait_for(client.post("/notes", json={"title": "a"}), 3)
+        second = await asyncio.wait_for(client.post("/notes", json={"title": "b"}), 3)
+        return first, second
+
+    first, second = api(scenario)
+    assert first.status_code == 500
+    assert second.status_code == 201
+
+
+def test_writes_work_without_fcntl(api, monkeypatch):
+    monkeypatch.setattr(main, "fcntl", None)
+
+    async def scenario(client):
+        await client.post("/notes", json={"title": "a"})
+        return await client.get("/notes")
+
+    response = api(scenario)
+    assert [n["title"] for n in response.json()] == ["a"]
+
+
+def test_reload_error_fails_its_batch_without_stalling_the_writer(api, store, monkeypatch):
+    async def scenario(client):
+        await client.post("/notes", json={"title": "a"})
+        _write_log(store, {"op": "put", "note": {"id": "ext", "title": "ext", "content": "", "tags": []}})
+        _fail_once(monkeypatch, "_replay", OSError("read failed"))
+        failed = await asyncio.wait_for(client.post("/notes", json={"title": "b"}), 3)
+        ok = await asyncio.wait_for(client.post("/notes", json={"title": "c"}), 3)
+        return failed, ok, (await client.get("/notes")).json()
+
+    failed, ok, listed = api(scenario)
+    assert failed.status_code == 500
+    assert ok.status_code == 201
+    assert [n["title"] for n in listed] == ["c", "ext", "a"]
+
+
+def test_mutations_fail_fast_once_the_writer_has_stopped(api):
+    async def scenario(client):
+        main._committer_task.cancel()
+        await asyncio.sleep(0)
+        return await asyncio.wait_for(client.post("/notes", json={"title": "a"}), 3)
+
+    assert api(scenario).status_code == 500
+
+
+def test_replay_applies_log_on_top_of_snapshot(store):
+    (store / "notes.json").write_bytes(orjson.dumps([
+        {"id": "b", "title": "b", "content": "", "tags": []},
+        {"id": "a", "title": "a", "content": "", "tags": []},
+    ]))
+    _write_log(
+        store,
+        {"op": "put", "note": {"id": "c", "title": "c", "content": "", "tags": []}},
+        {"op": "put", "note": {"id": "a", "title": "a2", "content": "", "tags": ["t"]}},
+        {"op": "del", "id": "b"},
+    )
+    main._replay()
+    assert [(n["id"], n["title"]) for n in main._list_notes()] == [("c", "c"), ("a", "a2")]
+
+
+def test_replay_truncates_torn_final_record(store):
+    _write_log(store, {"op": "put", "note": {"id": "a", "title": "a", "content": "", "tags": []}})
+    with (store / "notes.log").open("ab") as f:
+        f.write(b'{"op":"put","note":{"id":"b"')
+    main._replay()
+    assert [n["id"] for n in main._list_notes()] == ["a"]
+    assert not (store / "notes.log").exists()
+    assert [n["id"] for n in orjson.loads((store / "notes.json").read_bytes())] == ["a"]
+
+
+def test_log_is_kept_below_the_compaction_threshold(api, store):
+    async def scenario(client):
+        await client.post("/notes", json={"title": "a"})
+
+    api(scenario)
+    assert (store / "notes.log").exists()
+    assert not (store / "notes.json").exists()
+
+
+def test_log_is_compacted_past_the_threshold(api, store, monkeypatch):
+    monkeypatch.setattr(main, "LOG_COMPACT_MIN_BYTES", 0)
+    monkeypatch.setattr(main, "LOG_COMPACT_RATIO", 0)
+
+    async def scenario(client):
+        await client.post("/notes", json={"title": "a"})
+        await client.post("/notes", json={"title": "b"})
+
+    api(scenario)
+    assert not (store / "notes.log").exists()
+    assert [n["title"] for n in orjson.loads((store / "notes.json").read_bytes())] == ["b", "a"]
+
+
+def test_put_and_delete_in_one_batch_apply_in_arrival_order(api):
+    async def scenario(client):
+        note = (await client.post("/notes", json={"title": "a"})).json()
+        deleted, updated = await asyncio.gather(
+            main._submit({"op": "del", "id": note["id"]}),
+            main._submit({"op": "update", "id": note["id"], "changes": {"title": "b"}}),
+        )
+        return deleted, updated, (await client.get("/notes")).json()
+
+    deleted, updated, listed = api(scenario)
+    assert deleted["op"] == "del"
+    assert updated is None
+    assert listed == []
+    main._replay()
+    assert main._list_notes() == []
+
+
+def test_persist_error_fails_the_batch_and_rolls_back_the_mirror(api, monkeypatch):
+    async def scenario(client):
+        note = (await client.post("/notes", json={"title": "orig"})).json()
+        _fail_once(monkeypatch, "_persist", OSError("disk full"))
+        failed = await client.put(f"/notes/{note['id']}", json={"title": "changed"})
+        after_failure = (await client.get("/notes")).json()
+        ok = await client.put(f"/notes/{note['id']}", json={"title": "again"})
+        return failed, after_failure, ok
+
+    failed, after_failure, ok = api(scenario)
+    assert failed.status_code == 500
+    assert [n["title"] for n in after_failure] == ["orig"]
+    assert ok.status_code == 200
+    assert ok.json()["title"] == "again"
+
+
+def test_reads_never_see_a_batch_before_it_is_durable(api, monkeypatch):
+    real = main._persist
+    started = []
+
+    def slow_failing_persist(*args):
+        started.append(True)
+        time.sleep(0.3)
+        raise OSError("disk full")
+
+    async def scenario(client):
+        seed = (await client.post("/notes", json={"title": "seed"})).json()
+        monkeypatch.setattr(main, "_persist", slow_failing_persist)
+        create = asyncio.ensure_future(client.post("/notes", json={"title": "ghost"}))
+        update = asyncio.ensure_future(client.put(f"/notes/{seed['id']}", json={"title": "ghost"}))
+        for _ in range(300):
+            if started:
+                break
+            await asyncio.sleep(0.01)
+        during = (await client.get("/notes")).json()
+        failed = await asyncio.gather(create, update)
+        monkeypatch.setattr(main, "_persist", real)
+        after = (await client.get("/notes")).json()
+        return during, failed, after
+
+    during, failed, after = api(scenario)
+    assert [n["title"] for n in during] == ["seed"]
+    assert [r.status_code for r in failed] == [500, 500]
+    assert [n["title"] for n in after] == ["seed"]